@@ -0,0 +1,17 @@
+# Generated by Django 5.1.3 on 2026-10-15 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('netflixapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-created'], name='movie_created_desc_idx'),
+        ),
+    ]
@@ -28,6 +28,21 @@ class Profile(models.Model):
     def __str__(self):
         return self.name
 
+# Prefetch for a movie's videos, selecting only the columns the templates use
+def video_prefetch():
+    return models.Prefetch('video', queryset=Video.objects.only('title', 'file'))
+
+# QuerySet helpers for fetching movies together with their related data
+class MovieQuerySet(models.QuerySet):
+    def with_videos(self):
+        # Load every movie's videos in one extra query instead of one per movie
+        return self.prefetch_related(video_prefetch())
+
+    def for_listing(self):
+        # List pages only show titles and covers, so skip the potentially large
+        # description column and prefetch the videos
+        return self.defer('description').with_videos()
+
 # Movie model to represent movies in the database
 class Movie(models.Model):
     title = models.CharField(max_length=200)
@@ -39,6 +54,14 @@ class Movie(models.Model):
     image = models.ImageField(upload_to='covers/')
     age_limit = models.CharField(max_length=5, choices=AGE_CHOICES)
 
+    objects = MovieQuerySet.as_manager()
+
+    class Meta:
+        # uuid lookups are already covered by the unique constraint's index
+        indexes = [
+            models.Index(fields=['-created'], name='movie_created_desc_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
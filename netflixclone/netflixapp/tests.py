@@ -1,3 +1,185 @@
-from django.test import TestCase
+from unittest import mock
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from .models import CustomUser, Profile, Movie, Video
+from .views import MoviePrefetchMixin, paginate
+from . import views
+import requests
 
-# Create your tests here.
+# Serve static files without a collectstatic manifest during tests
+TEST_STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+MOVIES = [{'Title': 'Movie', 'Year': '2024', 'Poster': 'https://example.com/poster.jpg'}]
+
+def omdb_response(movies):
+    # Stand-in for a successful OMDB search response
+    response = mock.Mock()
+    response.json.return_value = {'Search': movies}
+    return response
+
+# Query-count regression guards for the movie views. Each count includes the
+# session and user lookups made by the authentication middleware.
+@override_settings(STORAGES=TEST_STORAGES)
+class MovieViewQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='password')
+        cls.profile = Profile.objects.create(name='Viewer', age_limit='All')
+        cls.user.profiles.add(cls.profile)
+        cls.movie = Movie.objects.create(title='Movie', type='seasonal', image='covers/movie.jpg', age_limit='All')
+        cls.movie.video.add(
+            Video.objects.create(title='Episode 1', file='movies/episode1.mp4'),
+            Video.objects.create(title='Episode 2', file='movies/episode2.mp4'),
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_movie_list(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('netflixapp:movie-list', args=[self.profile.uuid]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_movie_list_other_users_profile(self):
+        other_profile = Profile.objects.create(name='Other', age_limit='All')
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('netflixapp:movie-list', args=[other_profile.uuid]))
+        self.assertRedirects(response, reverse('netflixapp:profile-list'), fetch_redirect_response=False)
+
+    def test_movie_detail(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('netflixapp:movie-detail', args=[self.movie.uuid]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_play_movie(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('netflixapp:play-movie', args=[self.movie.uuid]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['movie']), 2)
+
+    def test_malformed_ids_redirect(self):
+        for name in ('movie-list', 'movie-detail', 'play-movie'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(f'netflixapp:{name}', args=['not-a-uuid']))
+                self.assertRedirects(response, reverse('netflixapp:profile-list'), fetch_redirect_response=False)
+
+# Template that touches every movie's videos, which is N+1 without prefetching
+MOVIE_VIDEOS_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {
+        'loaders': [('django.template.loaders.locmem.Loader', {
+            'movie_videos.html': '{% for movie in movies %}{% for video in movie.video.all %}{{ video.title }}{% endfor %}{% endfor %}',
+        })],
+    },
+}]
+
+@override_settings(TEMPLATES=MOVIE_VIDEOS_TEMPLATES)
+class MoviePrefetchMixinTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(3):
+            movie = Movie.objects.create(title=f'Movie {number}', type='single', image='covers/movie.jpg', age_limit='All')
+            movie.video.add(Video.objects.create(title=f'Video {number}', file=f'movies/video{number}.mp4'))
+
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_queryset_videos_prefetched(self):
+        with self.assertNumQueries(2):
+            response = MoviePrefetchMixin().render_with_prefetch(self.request, 'movie_videos.html', {'movies': Movie.objects.all()})
+        self.assertEqual(response.content, b'Video 0Video 1Video 2')
+
+    def test_page_videos_prefetched(self):
+        with self.assertNumQueries(3):
+            page = paginate(Movie.objects.order_by('id'), self.request)
+            response = MoviePrefetchMixin().render_with_prefetch(self.request, 'movie_videos.html', {'movies': page})
+        self.assertEqual(response.content, b'Video 0Video 1Video 2')
+
+    def test_already_prefetched_queryset(self):
+        with self.assertNumQueries(2):
+            MoviePrefetchMixin().render_with_prefetch(self.request, 'movie_videos.html', {'movies': Movie.objects.with_videos()})
+
+@override_settings(STORAGES=TEST_STORAGES)
+class MovieListAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='viewer', email='viewer@example.com', password='password')
+        cls.profile = Profile.objects.create(name='Viewer', age_limit='All')
+        cls.user.profiles.add(cls.profile)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_cold_cache_fetches_movies(self):
+        with mock.patch.object(views.omdb_session, 'get', return_value=omdb_response(MOVIES)) as get:
+            response = self.client.get(reverse('netflixapp:movie-list-api'))
+        get.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'movies': MOVIES})
+
+    def test_api_error_returns_503(self):
+        with mock.patch.object(views.omdb_session, 'get', side_effect=requests.ConnectionError), self.assertLogs('django', 'ERROR'):
+            response = self.client.get(reverse('netflixapp:movie-list-api'))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('error', response.json())
+
+    def test_movie_list_renders_cached_movies(self):
+        cache.set(views.OMDB_CACHE_KEY, MOVIES)
+        with mock.patch.object(views.omdb_session, 'get') as get:
+            response = self.client.get(reverse('netflixapp:movie-list', args=[self.profile.uuid]))
+        get.assert_not_called()
+        self.assertContains(response, '<strong>Movie</strong> (2024)')
+        self.assertNotContains(response, reverse('netflixapp:movie-list-api'))
+        self.assertNotContains(response, '<script>')
+
+class OmdbCacheTests(SimpleTestCase):
+    """Stale-while-revalidate behaviour of the OMDB search cache"""
+    def setUp(self):
+        cache.clear()
+        self.url = views.omdb_search_url()
+
+    def test_fresh_hit_skips_api(self):
+        cache.set(views.OMDB_CACHE_KEY, MOVIES)
+        with mock.patch.object(views.omdb_session, 'get') as get:
+            self.assertEqual(views.fetch_omdb_movies(self.url), MOVIES)
+        get.assert_not_called()
+
+    def test_stale_hit_starts_one_background_refresh(self):
+        cache.set(views.OMDB_STALE_CACHE_KEY, MOVIES)
+        with mock.patch.object(views, 'Thread') as thread:
+            self.assertEqual(views.fetch_omdb_movies(self.url), MOVIES)
+            thread.assert_called_once()
+            thread.return_value.start.assert_called_once()
+            self.assertTrue(cache.get(views.OMDB_REFRESH_LOCK_KEY))
+
+            # The lock is still held, so a second call doesn't start another refresh
+            self.assertEqual(views.fetch_omdb_movies(self.url), MOVIES)
+            thread.assert_called_once()
+
+    def test_failed_background_refresh_releases_lock(self):
+        cache.set(views.OMDB_STALE_CACHE_KEY, MOVIES)
+
+        # Run the refresh synchronously in place of the background thread
+        def run_target(target, daemon):
+            return mock.Mock(start=target)
+
+        with mock.patch.object(views, 'Thread', side_effect=run_target), \
+                mock.patch.object(views.omdb_session, 'get', side_effect=requests.ConnectionError), \
+                self.assertLogs('django', 'ERROR'):
+            self.assertEqual(views.fetch_omdb_movies(self.url), MOVIES)
+        self.assertIsNone(cache.get(views.OMDB_REFRESH_LOCK_KEY))
+        self.assertIsNone(cache.get(views.OMDB_CACHE_KEY))
+        self.assertEqual(cache.get(views.OMDB_STALE_CACHE_KEY), MOVIES)
+
+    def test_cold_cache_fetches_synchronously(self):
+        with mock.patch.object(views.omdb_session, 'get', return_value=omdb_response(MOVIES)) as get:
+            self.assertEqual(views.fetch_omdb_movies(self.url), MOVIES)
+        get.assert_called_once()
+        self.assertEqual(cache.get(views.OMDB_CACHE_KEY), MOVIES)
+        self.assertEqual(cache.get(views.OMDB_STALE_CACHE_KEY), MOVIES)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import Home, ProfileList, ProfileCreate, MovieList, MovieDetail, PlayMovie, debug_settings
+from .views import Home, ProfileList, ProfileCreate, MovieList, MovieListAPI, MovieDetail, PlayMovie, debug_settings
 
 app_name = 'netflixapp'
 
@@ -9,6 +9,7 @@ urlpatterns = [
     path('profiles/', ProfileList.as_view(), name="profile-list"),
     path('profile/create/', ProfileCreate.as_view(), name="profile-create"),
     path('watch/<str:profile_id>/', MovieList.as_view(), name="movie-list"),
+    path('api/movies/', MovieListAPI.as_view(), name="movie-list-api"),
     path('watch/detail/<str:movie_id>/', MovieDetail.as_view(), name="movie-detail"),
     path('watch/play/<str:movie_id>/', PlayMovie.as_view(), name="play-movie"),
 ]
@@ -1,18 +1,157 @@
 from django.shortcuts import render, redirect
 from django.views import View
 from django.conf import settings
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, HttpResponseNotFound, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import cache_page
+from django.views.decorators.vary import vary_on_cookie
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import QuerySet, prefetch_related_objects
 from .forms import ProfileForm
-from .models import Profile, Movie
+from .models import Profile, Movie, Video, video_prefetch
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from threading import Thread
 import requests
 import logging
 
 # Set up logger for error tracking and debugging
 logger = logging.getLogger('django')
 
+# Cache keys for the OMDB movie search, using stale-while-revalidate: the
+# fresh entry expires quickly, the stale copy is kept indefinitely and served
+# while a background refresh runs or when the API cannot be reached.
+OMDB_CACHE_KEY = 'omdb:search:movie'
+OMDB_STALE_CACHE_KEY = 'omdb:search:movie:stale'
+OMDB_REFRESH_LOCK_KEY = 'omdb:search:movie:refreshing'
+OMDB_CACHE_TIMEOUT = 60
+
+# Shared HTTP session so OMDB requests reuse pooled connections, with one
+# retry and backoff for transient server errors. Read timeouts are not
+# retried and Retry-After is ignored, so a call makes at most two attempts of
+# OMDB_TIMEOUT each (16s plus backoff), below gunicorn's 30s worker timeout.
+OMDB_TIMEOUT = (3, 5)
+omdb_session = requests.Session()
+omdb_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=1,
+        read=0,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False,
+    ),
+)
+omdb_session.mount('http://', omdb_adapter)
+omdb_session.mount('https://', omdb_adapter)
+
+def fetch_omdb_page(url):
+    """Fetches a single page of OMDB search results."""
+    response = omdb_session.get(url, timeout=OMDB_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get('Search', [])
+
+def omdb_search_url():
+    """Returns the OMDB search URL for the movie list."""
+    return f'http://www.omdbapi.com/?s=movie&apikey={settings.OMDB_API_KEY}'
+
+def refresh_omdb_movies(url):
+    """
+    Fetches the OMDB search results for the given URL and stores them in the
+    cache. The first OMDB_SEARCH_PAGES pages are requested in parallel. The
+    parsed list is cached rather than the raw response so cache hits skip JSON
+    decoding. Raises requests.RequestException if the API call fails.
+    """
+    pages = settings.OMDB_SEARCH_PAGES
+    if pages == 1:
+        movies = fetch_omdb_page(f'{url}&page=1')
+    else:
+        urls = [f'{url}&page={page}' for page in range(1, pages + 1)]
+        with ThreadPoolExecutor(max_workers=pages) as executor:
+            movies = [movie for results in executor.map(fetch_omdb_page, urls) for movie in results]
+    cache.set(OMDB_CACHE_KEY, movies, OMDB_CACHE_TIMEOUT)
+    cache.set(OMDB_STALE_CACHE_KEY, movies, timeout=None)
+    return movies
+
+def refresh_omdb_movies_in_background(url):
+    """Refreshes the cached OMDB results in a background thread, at most one at a time."""
+    if not cache.add(OMDB_REFRESH_LOCK_KEY, True, OMDB_CACHE_TIMEOUT):
+        return
+
+    def refresh():
+        try:
+            refresh_omdb_movies(url)
+        except requests.RequestException as e:
+            logger.error("OMDB API background refresh error: %s", e)
+        finally:
+            cache.delete(OMDB_REFRESH_LOCK_KEY)
+
+    Thread(target=refresh, daemon=True).start()
+
+def get_cached_omdb_movies(url):
+    """
+    Returns the cached OMDB results without waiting on the API. Stale results
+    are returned while a background refresh is triggered; returns None if
+    nothing has been cached yet.
+    """
+    movies = cache.get(OMDB_CACHE_KEY)
+    if movies is None:
+        movies = cache.get(OMDB_STALE_CACHE_KEY)
+        if movies is not None:
+            refresh_omdb_movies_in_background(url)
+    return movies
+
+def fetch_omdb_movies(url):
+    """
+    Returns the OMDB search results for the given URL, served from the cache
+    when available and fetched synchronously otherwise. Raises
+    requests.RequestException if the API call fails.
+    """
+    movies = get_cached_omdb_movies(url)
+    if movies is None:
+        movies = refresh_omdb_movies(url)
+    return movies
+
+def paginate(queryset, request, per_page=24):
+    """
+    Returns the page of the queryset requested via the ?page= parameter.
+    Use for movie listings so memory and DB I/O stay bounded by the page size,
+    e.g. paginate(Movie.objects.for_listing().order_by('-created'), request)
+    """
+    return Paginator(queryset, per_page).get_page(request.GET.get('page'))
+
+class MoviePrefetchMixin:
+    """
+    Renders templates with videos prefetched for any Movie querysets (or pages
+    of them) in the context, so templates can use movie.video without
+    triggering one query per movie. Movies whose videos are already
+    prefetched are left untouched.
+    
+    Note that Movie querysets are evaluated into lists before rendering, so
+    templates can't call queryset methods such as count or exists on them.
+    """
+    def prefetch_movies(self, value):
+        if isinstance(value, QuerySet) and value.model is Movie:
+            movies = list(value)
+            prefetch_related_objects(movies, video_prefetch())
+            return movies
+        if isinstance(value, Page):
+            value.object_list = self.prefetch_movies(value.object_list)
+        return value
+
+    def render_with_prefetch(self, request, template_name, context):
+        context = {key: self.prefetch_movies(value) for key, value in context.items()}
+        return render(request, template_name, context)
+
 class Home(View):
     """
     Landing page view that handles the initial user experience:
@@ -39,7 +178,8 @@ class ProfileList(View):
     - profiles: QuerySet of Profile objects linked to the current user
     """
     def get(self, request, *args, **kwargs):
-        profiles = request.user.profiles.all()
+        # Load only the columns the profile picker renders
+        profiles = request.user.profiles.only('name', 'uuid', 'age_limit')
         context = {'profiles': profiles}
         return render(request, 'profilelist.html', context)
 
@@ -51,6 +191,7 @@ class ProfileCreate(View):
     Security:
     - Requires user authentication (@login_required)
     - Form validation for profile data
+    - Profile creation and user association run in a single transaction
     - Exception handling for creation errors
     
     Methods:
@@ -71,14 +212,15 @@ class ProfileCreate(View):
         form = ProfileForm(request.POST or None)
         if form.is_valid():
             try:
-                # Create profile and associate with current user
-                profile = Profile.objects.create(**form.cleaned_data)
-                if profile:
+                # Create profile and associate with current user in one transaction
+                # so a failure between the two writes can't leave an orphaned profile
+                with transaction.atomic():
+                    profile = Profile.objects.create(**form.cleaned_data)
                     request.user.profiles.add(profile)
-                    return redirect('netflixapp:profile-list')
+                return redirect('netflixapp:profile-list')
             except Exception as e:
                 # Log error and add form error message
-                logger.error(f"Error creating profile: {str(e)}")
+                logger.error("Error creating profile: %s", e)
                 form.add_error(None, "An error occurred while creating the profile.")
         context = {'form': form}
         return render(request, 'profilecreate.html', context)
@@ -86,68 +228,74 @@ class ProfileCreate(View):
 @method_decorator(login_required, name='dispatch')
 class MovieList(View):
     """
-    Displays a list of movies fetched from OMDB API for a specific user profile.
+    Displays the movie list page for a specific user profile.
+    
+    The page is rendered without waiting on the OMDB API: cached search
+    results are included when available, otherwise the browser loads them
+    from MovieListAPI after the page has rendered.
     
     Security:
     - Requires user authentication (@login_required)
     - Validates profile ownership
-    - Handles API errors gracefully
-    
-    API Integration:
-    - Fetches movie data from OMDB API
-    - Implements 10-second timeout
-    - Includes error handling for API failures
     
     Error Handling:
-    - Profile validation
-    - API request errors
+    - Profile validation, including malformed profile IDs
     - Invalid profile access attempts
-    - General exception handling
     
     Template: movielist.html
     Context:
-    - movies: List of movies from OMDB API
+    - movies: Cached list of movies from OMDB API (None if not cached yet)
     - profile_id: Current profile's UUID
-    - error: Error message (if API request fails)
     """
     def get(self, request, profile_id, *args, **kwargs):
         try:
-            # Verify profile exists and belongs to current user
-            profile = Profile.objects.get(uuid=profile_id)
-            
-            if profile not in request.user.profiles.all():
-                return redirect('netflixapp:profile-list')
-            
-            # Fetch movies from OMDB API
-            api_key = settings.OMDB_API_KEY
-            url = f'http://www.omdbapi.com/?s=movie&apikey={api_key}'
-            
-            try:
-                # Make API request with timeout
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                movies = data.get('Search', [])
-                
-                context = {'movies': movies, 'profile_id': profile_id}
-                return render(request, 'movielist.html', context)
-            
-            except requests.RequestException as e:
-                # Handle API request errors
-                logger.error(f"OMDB API error: {str(e)}")
-                context = {'error': 'Unable to fetch movies at this time.', 'profile_id': profile_id}
-                return render(request, 'movielist.html', context)
-
-        except Profile.DoesNotExist:
-            # Handle invalid profile access attempts
-            logger.warning(f"Attempted to access non-existent profile: {profile_id}")
-            return redirect('netflixapp:profile-list')
-        except Exception as e:
-            # Handle unexpected errors
-            logger.error(f"Unexpected error in MovieList view: {str(e)}")
+            # Verify profile exists and belongs to current user in a single query
+            profile = request.user.profiles.filter(uuid=profile_id).only('uuid').first()
+        except ValidationError:
+            # Malformed UUIDs can't match any profile
+            profile = None
+        
+        if profile is None:
+            logger.warning("Attempted to access invalid profile: %s", profile_id)
             return redirect('netflixapp:profile-list')
+        
+        # Only use already cached results, never block on the API here
+        movies = get_cached_omdb_movies(omdb_search_url())
+        context = {'movies': movies, 'profile_id': profile_id}
+        return render(request, 'movielist.html', context)
 
 @method_decorator(login_required, name='dispatch')
+class MovieListAPI(View):
+    """
+    Returns the OMDB movie list as JSON for the movie list page.
+    
+    Security:
+    - Requires user authentication (@login_required)
+    - Handles API errors gracefully
+    
+    API Integration:
+    - Fetches movie data from OMDB API
+    - Caches search results for 1 minute
+    - Serves stale results while refreshing them in the background
+    - Falls back to the last cached results if the API is unavailable
+    - Reuses pooled connections and retries transient server errors
+    - Implements 3-second connect and 5-second read timeouts
+    
+    Response:
+    - movies: List of movies from OMDB API
+    - error: Error message with status 503 (if API request fails)
+    """
+    def get(self, request, *args, **kwargs):
+        try:
+            # Serve cached results or make API request with timeout
+            movies = fetch_omdb_movies(omdb_search_url())
+        except requests.RequestException as e:
+            # Handle API request errors, only reached when nothing is cached
+            logger.error("OMDB API error: %s", e)
+            return JsonResponse({'error': 'Unable to fetch movies at this time.'}, status=503)
+        return JsonResponse({'movies': movies})
+
+@method_decorator([login_required, cache_page(60 * 10), vary_on_cookie], name='dispatch')
 class MovieDetail(View):
     """
     Displays detailed information about a specific movie.
@@ -157,10 +305,12 @@ class MovieDetail(View):
     - Validates movie existence
     - Logs unauthorized access attempts
     
+    Caching:
+    - Rendered page is cached for 10 minutes per session cookie
+    
     Error Handling:
-    - Handles non-existent movies
+    - Handles non-existent movies and malformed movie IDs
     - Logs access attempts to invalid movies
-    - Catches and logs unexpected errors
     
     Template: moviedetail.html
     Context:
@@ -170,16 +320,12 @@ class MovieDetail(View):
         try:
             # Fetch movie details by UUID
             movie = Movie.objects.get(uuid=movie_id)
-            context = {"movie": movie}
-            return render(request, 'moviedetail.html', context)
-        except Movie.DoesNotExist:
+        except (Movie.DoesNotExist, ValidationError):
             # Handle and log invalid movie access attempts
-            logger.warning(f"Attempted to access non-existent movie: {movie_id}")
-            return redirect('netflixapp:profile-list')
-        except Exception as e:
-            # Handle unexpected errors
-            logger.error(f"Error in MovieDetail view: {str(e)}")
+            logger.warning("Attempted to access non-existent movie: %s", movie_id)
             return redirect('netflixapp:profile-list')
+        context = {"movie": movie}
+        return render(request, 'moviedetail.html', context)
 
 @method_decorator(login_required, name='dispatch')
 class PlayMovie(View):
@@ -192,13 +338,13 @@ class PlayMovie(View):
     - Logs unauthorized access attempts
     
     Features:
-    - Retrieves video information for the selected movie
-    - Converts video QuerySet to list for template rendering
+    - Retrieves video information for the selected movie in a single query
+    - Only the id, title and file columns are loaded
+    - File URLs are resolved through the configured media storage
     
     Error Handling:
-    - Handles non-existent movies
+    - Handles non-existent movies and malformed movie IDs
     - Logs playback attempts for invalid movies
-    - Catches and logs unexpected errors
     
     Template: playmovie.html
     Context:
@@ -206,27 +352,36 @@ class PlayMovie(View):
     """
     def get(self, request, movie_id, *args, **kwargs):
         try:
-            # Fetch movie and its associated video data
-            movie = Movie.objects.get(uuid=movie_id)
-            movie = movie.video.values()  # Get associated video information
-            context = {"movie": list(movie)}
-            return render(request, 'playmovie.html', context)
-        except Movie.DoesNotExist:
+            # Fetch only the video fields the player needs through the M2M join
+            videos = list(Video.objects.filter(movie__uuid=movie_id).values('id', 'title', 'file'))
+            movie_exists = bool(videos) or Movie.objects.filter(uuid=movie_id).exists()
+        except ValidationError:
+            # Malformed UUIDs can't match any movie
+            movie_exists = False
+        if not movie_exists:
             # Handle and log invalid movie access attempts
-            logger.warning(f"Attempted to play non-existent movie: {movie_id}")
-            return redirect('netflixapp:profile-list')
-        except Exception as e:
-            # Handle unexpected errors
-            logger.error(f"Error in PlayMovie view: {str(e)}")
+            logger.warning("Attempted to play non-existent movie: %s", movie_id)
             return redirect('netflixapp:profile-list')
+        for video in videos:
+            # Resolve the public URL through the configured storage (local or CDN)
+            video['url'] = default_storage.url(video['file'])
+        context = {"movie": videos}
+        return render(request, 'playmovie.html', context)
 
-@csrf_exempt
-def debug_settings(request):
-    """Debug view to check security settings"""
+@lru_cache(maxsize=None)
+def debug_settings_payload():
+    """Serialized security settings; they are fixed for the process lifetime"""
     security_settings = {
         'SECURE_SSL_REDIRECT': getattr(settings, 'SECURE_SSL_REDIRECT', None),
         'SESSION_COOKIE_SECURE': getattr(settings, 'SESSION_COOKIE_SECURE', None),
         'CSRF_COOKIE_SECURE': getattr(settings, 'CSRF_COOKIE_SECURE', None),
         'DEBUG': getattr(settings, 'DEBUG', None),
     }
-    return JsonResponse(security_settings)
+    return JsonResponse(security_settings).content
+
+@csrf_exempt
+def debug_settings(request):
+    """Debug view to check security settings, only available when DEBUG is on"""
+    if not settings.DEBUG:
+        return HttpResponseNotFound()
+    return HttpResponse(debug_settings_payload(), content_type='application/json')
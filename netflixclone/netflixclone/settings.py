@@ -41,6 +41,7 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',  # For static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',  # ETag / Last-Modified 304 responses
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -68,9 +69,16 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'netflixclone.wsgi.application'
 
+# Keep database connections open between requests and check them before reuse
 DATABASES = {
-    'default': config('DATABASE_URL', cast=dj_database_url.parse)
+    'default': dj_database_url.parse(
+        config('DATABASE_URL'),
+        conn_max_age=config('CONN_MAX_AGE', default=60, cast=int),
+        conn_health_checks=True,
+    )
 }
+# Required when connecting through PgBouncer in transaction pooling mode
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = config('DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,6 +105,23 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+# Cache configuration
+# Uses Redis when REDIS_URL is set, otherwise falls back to local memory
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Static files configuration
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATIC_URL = 'static/'
@@ -104,18 +129,40 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'staticfiles'),
     os.path.join(BASE_DIR, 'static/assets'),
     ]
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files configuration
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Storage backends
+# Media is served from S3 behind a CDN when AWS_STORAGE_BUCKET_NAME is set,
+# otherwise from the local filesystem
+AWS_STORAGE_BUCKET_NAME = config('AWS_STORAGE_BUCKET_NAME', default='')
+if AWS_STORAGE_BUCKET_NAME:
+    DEFAULT_STORAGE_BACKEND = 'storages.backends.s3boto3.S3Boto3Storage'
+    AWS_S3_CUSTOM_DOMAIN = config('AWS_S3_CUSTOM_DOMAIN', default=None)
+    # Unsigned URLs are stable, so they can be cached by the CDN and browsers
+    AWS_QUERYSTRING_AUTH = False
+else:
+    DEFAULT_STORAGE_BACKEND = 'django.core.files.storage.FileSystemStorage'
+
+STORAGES = {
+    'default': {
+        'BACKEND': DEFAULT_STORAGE_BACKEND,
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 AUTH_USER_MODEL = 'netflixapp.CustomUser'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # API Settings
 OMDB_API_KEY = config('OMDB_API_KEY')
+# Number of OMDB search pages fetched in parallel, at least one
+OMDB_SEARCH_PAGES = max(1, config('OMDB_SEARCH_PAGES', default=1, cast=int))
 
 # Site and Authentication Settings
 SITE_ID = 1